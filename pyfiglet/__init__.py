@@ -7,15 +7,11 @@ Python FIGlet adaption
 
 from __future__ import print_function, unicode_literals
 
+import functools
 import itertools
-import importlib.resources
 import os
-import pathlib
 import re
-import shutil
 import sys
-import zipfile
-from optparse import OptionParser
 
 from .version import __version__
 
@@ -54,8 +50,12 @@ COLOR_CODES = {'BLACK': 30, 'RED': 31, 'GREEN': 32, 'YELLOW': 33, 'BLUE': 34, 'M
                'DEFAULT': 39, 'DARK_GRAY': 90, 'LIGHT_RED': 91, 'LIGHT_GREEN': 92, 'LIGHT_YELLOW': 93, 'LIGHT_BLUE': 94,
                'LIGHT_MAGENTA': 95, 'LIGHT_CYAN': 96, 'WHITE': 97, 'RESET': 0
 }
+SORTED_COLOR_NAMES = tuple(sorted(COLOR_CODES))
+FOREGROUND_COLOR_CODES = {name: str(code) for name, code in COLOR_CODES.items()}
+BACKGROUND_COLOR_CODES = {name: str(code + 10) for name, code in COLOR_CODES.items()}
 
 RESET_COLORS = b'\033[0m'
+RESET_COLORS_TEXT = RESET_COLORS.decode('ascii')
 
 if sys.platform == 'win32':
     SHARED_DIRECTORY = os.path.join(os.environ["APPDATA"], "pyfiglet")
@@ -69,14 +69,15 @@ def figlet_format(text, font=DEFAULT_FONT, **kwargs):
 
 
 def print_figlet(text, font=DEFAULT_FONT, colors=":", **kwargs):
-    ansiColors = parse_color(colors)
+    r = figlet_format(text, font, **kwargs)
+    ansiColors = _colors_for(r, colors)
     if ansiColors:
         sys.stdout.write(ansiColors)
 
-    print(figlet_format(text, font, **kwargs))
+    print(r)
 
     if ansiColors:
-        sys.stdout.write(RESET_COLORS.decode('UTF-8', 'replace'))
+        sys.stdout.write(RESET_COLORS_TEXT)
         sys.stdout.flush()
 
 
@@ -117,24 +118,74 @@ class FigletFont(object):
     """
 
     reMagicNumber = re.compile(r'^[tf]lf2.')
+    zipMagic = b'PK\x03\x04'
     reEndMarker = re.compile(r'(.)\s*$')
+    reLineBreaks = re.compile(r"[\u0085\u2028\u2029]")
+    reHexPrefix = re.compile('^0x', re.IGNORECASE)
+    reInfoStartMarker = re.compile(r"""
+        ^(FONT|COMMENT|FONTNAME_REGISTRY|FAMILY_NAME|FOUNDRY|WEIGHT_NAME|
+          SETWIDTH_NAME|SLANT|ADD_STYLE_NAME|PIXEL_SIZE|POINT_SIZE|
+          RESOLUTION_X|RESOLUTION_Y|SPACING|AVERAGE_WIDTH|
+          FONT_DESCENT|FONT_ASCENT|CAP_HEIGHT|X_HEIGHT|FACE_NAME|FULL_NAME|
+          COPYRIGHT|_DEC_|DEFAULT_CHAR|NOTICE|RELATIVE_).*""", re.VERBOSE)
+    reInfoEndMarker = re.compile(r'^.*[@#$]$')
+
+    # Compiled end-of-line patterns, keyed by a font's end marker character
+    _charEndPatterns = {}
+
+    _sorted_fonts_cache = None
 
     def __init__(self, font=DEFAULT_FONT):
-        self.font = font
+        font_path = self.findFont(font)
+        if font_path is None:
+            raise FontNotFound(font)
 
-        self.comment = ''
-        self.chars = {}
-        self.width = {}
-        self.data = self.preloadFont(font)
-        self.loadFont()
+        # Parsing is by far the most expensive part of using a font, so
+        # reuse the result for as long as the font file is unchanged.
+        loaded = self._loadCached(font, str(font_path), self._fontStamp(font_path))
+        self.__dict__.update(loaded.__dict__)
+        # The cached glyphs are tuples; give each instance its own rows
+        self.chars = {i: list(letter) for i, letter in loaded.chars.items()}
+        self.width = dict(loaded.width)
+        self.edges = dict(loaded.edges)
 
     @classmethod
-    def preloadFont(cls, font):
+    @functools.lru_cache(maxsize=64)
+    def _loadCached(cls, font, location, stamp):
         """
-        Load font data if exist
+        Load and parse a font; location and stamp only serve as cache keys
         """
+        loaded = cls.__new__(cls)
+        loaded.font = font
+
+        loaded.comment = ''
+        loaded.chars = {}
+        loaded.width = {}
+        loaded.edges = {}
+        loaded.data = cls.preloadFont(font)
+        loaded.loadFont()
+        return loaded
+
+    @staticmethod
+    def _fontStamp(font_path):
+        """
+        Modification time of a font file, or 0 if it can't be determined
+        (for example for fonts inside a zipped package)
+        """
+        try:
+            return font_path.stat().st_mtime_ns
+        except (AttributeError, OSError):
+            return 0
+
+    @classmethod
+    def findFont(cls, font):
+        """
+        Locate a font file, returning None if it can't be found
+        """
+        import importlib.resources
+        import pathlib
+
         # Find a plausible looking font file.
-        data = None
         font_path = None
         for extension in ('tlf', 'flf'):
             fn = '%s.%s' % (font, extension)
@@ -148,18 +199,38 @@ class FigletFont(object):
                     if os.path.isfile(full_name):
                         font_path = pathlib.Path(full_name)
                         break
+        return font_path
+
+    @classmethod
+    def preloadFont(cls, font):
+        """
+        Load font data if exist
+        """
+        data = None
+        font_path = cls.findFont(font)
 
         # Unzip the first file if this file/stream looks like a ZIP file.
         if font_path:
+            import zipfile
             with font_path.open('rb') as f:
                 if zipfile.is_zipfile(f):
                     with zipfile.ZipFile(f) as zip_file:
-                        zip_font = zip_file.open(zip_file.namelist()[0])
+                        zip_font = zip_file.open(zip_file.infolist()[0])
                         data = zip_font.read()
                 else:
-                    # ZIP file check moves the current file pointer - reset to start of file.
-                    f.seek(0)
-                    data = f.read()
+                    import mmap
+                    # Decode straight out of a memory map of the font file
+                    # rather than reading it into a temporary bytes object.
+                    # That needs a real, non-empty file on disk.
+                    try:
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (AttributeError, OSError, ValueError):
+                        # ZIP file check moves the current file pointer - reset to start of file.
+                        f.seek(0)
+                        data = f.read()
+                    else:
+                        with mapped:
+                            return str(mapped, 'UTF-8', 'replace')
 
         # Return the decoded data (if any).
         if data:
@@ -171,7 +242,8 @@ class FigletFont(object):
     def isValidFont(cls, font):
         if not font.endswith(('.flf', '.tlf')):
             return False
-        f = None
+        import importlib.resources
+
         full_file = os.path.join(SHARED_DIRECTORY, font)
         if os.path.isfile(font):
             f = open(font, 'rb')
@@ -180,28 +252,36 @@ class FigletFont(object):
         else:
             f = importlib.resources.files('pyfiglet.fonts').joinpath(font).open('rb')
 
-        if zipfile.is_zipfile(f):
-            # If we have a match, the ZIP file spec says we should just read the first file in the ZIP.
-            with zipfile.ZipFile(f) as zip_file:
-                zip_font = zip_file.open(zip_file.namelist()[0])
-                header = zip_font.readline().decode('UTF-8', 'replace')
-        else:
-            # ZIP file check moves the current file pointer - reset to start of file.
-            f.seek(0)
-            header = f.readline().decode('UTF-8', 'replace')
-
-        f.close()
+        # Only the magic number matters, so sniff the first few bytes rather
+        # than letting is_zipfile() seek to the end of every font file.
+        with f:
+            header = f.read(5)
+            if header.startswith(cls.zipMagic):
+                # If we have a match, the ZIP file spec says we should just read the first file in the ZIP.
+                import zipfile
+                f.seek(0)
+                with zipfile.ZipFile(f) as zip_file:
+                    with zip_file.open(zip_file.infolist()[0]) as zip_font:
+                        header = zip_font.read(5)
 
-        return cls.reMagicNumber.search(header)
+        return cls.reMagicNumber.search(header.decode('UTF-8', 'replace'))
 
     @classmethod
     def getFonts(cls):
-        all_files = importlib.resources.files('pyfiglet.fonts').iterdir()
-        if os.path.isdir(SHARED_DIRECTORY):
-             all_files = itertools.chain(all_files, pathlib.Path(SHARED_DIRECTORY).iterdir())
-        return [font.name.split('.', 2)[0] for font
+        # Scanning the font directories opens every font file, so only do it
+        # once. installFonts() invalidates the cache.
+        if cls._sorted_fonts_cache is None:
+            import importlib.resources
+            import pathlib
+
+            all_files = importlib.resources.files('pyfiglet.fonts').iterdir()
+            if os.path.isdir(SHARED_DIRECTORY):
+                 all_files = itertools.chain(all_files, pathlib.Path(SHARED_DIRECTORY).iterdir())
+            cls._sorted_fonts_cache = tuple(sorted(
+                font.name.split('.', 2)[0] for font
                 in all_files
-                if font.is_file() and cls.isValidFont(font.name)]
+                if font.is_file() and cls.isValidFont(font.name)))
+        return list(cls._sorted_fonts_cache)
 
     @classmethod
     def infoFont(cls, font, short=False):
@@ -210,17 +290,10 @@ class FigletFont(object):
         """
         data = FigletFont.preloadFont(font)
         infos = []
-        reStartMarker = re.compile(r"""
-            ^(FONT|COMMENT|FONTNAME_REGISTRY|FAMILY_NAME|FOUNDRY|WEIGHT_NAME|
-              SETWIDTH_NAME|SLANT|ADD_STYLE_NAME|PIXEL_SIZE|POINT_SIZE|
-              RESOLUTION_X|RESOLUTION_Y|SPACING|AVERAGE_WIDTH|
-              FONT_DESCENT|FONT_ASCENT|CAP_HEIGHT|X_HEIGHT|FACE_NAME|FULL_NAME|
-              COPYRIGHT|_DEC_|DEFAULT_CHAR|NOTICE|RELATIVE_).*""", re.VERBOSE)
-        reEndMarker = re.compile(r'^.*[@#$]$')
         for line in data.splitlines()[0:100]:
             if (cls.reMagicNumber.search(line) is None
-                    and reStartMarker.search(line) is None
-                    and reEndMarker.search(line) is None):
+                    and cls.reInfoStartMarker.search(line) is None
+                    and cls.reInfoEndMarker.search(line) is None):
                 infos.append(line)
         return '\n'.join(infos) if not short else infos[0]
 
@@ -229,6 +302,10 @@ class FigletFont(object):
         """
         Install the specified font file to this system.
         """
+        import importlib.resources
+        import shutil
+        import zipfile
+
         if hasattr(importlib.resources.files('pyfiglet'), 'resolve'):
             # Figlet looks like a standard directory - so lets use that to install new fonts.
             location = str(importlib.resources.files('pyfiglet.fonts'))
@@ -256,6 +333,8 @@ class FigletFont(object):
         else:
             shutil.copy(file_name, location)
 
+        FigletFont._sorted_fonts_cache = None
+
     def loadFont(self):
         """
         Parse loaded font data for the rendering engine to consume
@@ -263,12 +342,16 @@ class FigletFont(object):
         try:
             # Remove any unicode line splitting characters other
             # than CRLF - to match figlet line parsing
-            data = re.sub(r"[\u0085\u2028\u2029]", " ", self.data)
+            data = self.reLineBreaks.sub(" ", self.data)
 
-            # Parse first line of file, the header
+            # Parse first line of file, the header. Lines are consumed by
+            # advancing pos rather than popping them off the front of the
+            # list, which would make parsing quadratic in the font length.
             data = data.splitlines()
+            pos = 0
 
-            header = data.pop(0)
+            header = data[pos]
+            pos += 1
             if self.reMagicNumber.search(header) is None:
                 raise FontError('%s is not a valid figlet font' % self.font)
 
@@ -307,65 +390,101 @@ class FigletFont(object):
             self.smushMode = fullLayout
 
             # Strip out comment lines
-            for i in range(0, commentLines):
-                self.comment += data.pop(0)
+            self.comment += ''.join(data[pos:pos + commentLines])
+            pos += commentLines
 
-            def __char(data):
+            def __char(pos):
                 """
                 Function loads one character in the internal array from font
-                file content
+                file content, starting at line pos
                 """
                 end = None
                 width = 0
                 chars = []
                 for j in range(0, height):
-                    line = data.pop(0)
+                    line = data[pos]
+                    pos += 1
                     if end is None:
                         end = self.reEndMarker.search(line).group(1)
-                        end = re.compile(re.escape(end) + r'{1,2}\s*$')
+                        pattern = self._charEndPatterns.get(end)
+                        if pattern is None:
+                            pattern = re.compile(re.escape(end) + r'{1,2}\s*$')
+                            self._charEndPatterns[end] = pattern
+                        end = pattern
 
                     line = end.sub('', line)
 
                     if len(line) > width:
                         width = len(line)
                     chars.append(line)
-                return width, chars
+                return width, chars, pos
 
             # Load ASCII standard character set (32 - 127).
             # Don't skip space definition as later rendering pipeline will
             # ignore all missing chars and space is critical for the line
             # breaking logic.
             for i in range(32, 127):
-                width, letter = __char(data)
+                width, letter, pos = __char(pos)
                 if i == 32 or ''.join(letter) != '':
-                    self.chars[i] = letter
+                    self.chars[i] = tuple(letter)
                     self.width[i] = width
 
             # Load German Umlaute - the follow directly after standard character 127
-            if data:
+            if pos < len(data):
                 for i in 'ÄÖÜäöüß':
-                    width, letter = __char(data)
+                    width, letter, pos = __char(pos)
                     if ''.join(letter) != '':
-                        self.chars[ord(i)] = letter
+                        self.chars[ord(i)] = tuple(letter)
                         self.width[ord(i)] = width
 
             # Load ASCII extended character set
-            while data:
-                line = data.pop(0).strip()
+            while pos < len(data):
+                line = data[pos].strip()
+                pos += 1
                 i = line.split(' ', 1)[0]
                 if (i == ''):
                     continue
-                hex_match = re.search('^0x', i, re.IGNORECASE)
+                hex_match = self.reHexPrefix.search(i)
                 if hex_match is not None:
                     i = int(i, 16)
-                    width, letter = __char(data)
+                    width, letter, pos = __char(pos)
                     if ''.join(letter) != '':
-                        self.chars[i] = letter
+                        self.chars[i] = tuple(letter)
                         self.width[i] = width
 
+            # Precompute the edges of every character for smushAmount
+            for i, letter in self.chars.items():
+                self.edges[i] = self.charEdges(letter)
+
         except Exception as e:
             raise FontError('problem parsing %s font: %s' % (self.font, e))
 
+    @staticmethod
+    def charEdges(letter):
+        """
+        For each row of a character, find how far its first visible column is
+        from the left edge and its last one from the right edge, together with
+        the characters found there.
+        """
+        left = []
+        right = []
+        for line in letter:
+            # Only strip ascii space to match figlet exactly.
+            charbd = len(line) - len(line.lstrip(' '))
+            if charbd < len(line):
+                left.append((charbd, line[charbd]))
+            else:
+                left.append((charbd, ''))
+
+            linebd = len(line.rstrip(' ')) - 1
+            if linebd < 0:
+                linebd = 0
+            if linebd < len(line):
+                right.append((len(line) - 1 - linebd, line[linebd]))
+            else:
+                right.append((-1, ''))
+        return left, right
+
     def __str__(self):
         return '<FigletFont object: %s>' % self.font
 
@@ -378,74 +497,59 @@ class FigletString(unicode_string):
     Rendered figlet font
     """
 
-    # translation map for reversing ascii art / -> \, etc.
-    __reverse_map__ = (
-        '\x00\x01\x02\x03\x04\x05\x06\x07\x08\t\n\x0b\x0c\r\x0e\x0f'
-        '\x10\x11\x12\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f'
-        ' !"#$%&\')(*+,-.\\'
-        '0123456789:;>=<?'
-        '@ABCDEFGHIJKLMNO'
-        'PQRSTUVWXYZ]/[^_'
-        '`abcdefghijklmno'
-        'pqrstuvwxyz}|{~\x7f'
-        '\x80\x81\x82\x83\x84\x85\x86\x87\x88\x89\x8a\x8b\x8c\x8d\x8e\x8f'
-        '\x90\x91\x92\x93\x94\x95\x96\x97\x98\x99\x9a\x9b\x9c\x9d\x9e\x9f'
-        '\xa0\xa1\xa2\xa3\xa4\xa5\xa6\xa7\xa8\xa9\xaa\xab\xac\xad\xae\xaf'
-        '\xb0\xb1\xb2\xb3\xb4\xb5\xb6\xb7\xb8\xb9\xba\xbb\xbc\xbd\xbe\xbf'
-        '\xc0\xc1\xc2\xc3\xc4\xc5\xc6\xc7\xc8\xc9\xca\xcb\xcc\xcd\xce\xcf'
-        '\xd0\xd1\xd2\xd3\xd4\xd5\xd6\xd7\xd8\xd9\xda\xdb\xdc\xdd\xde\xdf'
-        '\xe0\xe1\xe2\xe3\xe4\xe5\xe6\xe7\xe8\xe9\xea\xeb\xec\xed\xee\xef'
-        '\xf0\xf1\xf2\xf3\xf4\xf5\xf6\xf7\xf8\xf9\xfa\xfb\xfc\xfd\xfe\xff')
-
-    # translation map for flipping ascii art ^ -> v, etc.
-    __flip_map__ = (
-        '\x00\x01\x02\x03\x04\x05\x06\x07\x08\t\n\x0b\x0c\r\x0e\x0f'
-        '\x10\x11\x12\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f'
-        ' !"#$%&\'()*+,-.\\'
-        '0123456789:;<=>?'
-        '@VBCDEFGHIJKLWNO'
-        'bQbSTUAMXYZ[/]v-'
-        '`aPcdefghijklwno'
-        'pqrstu^mxyz{|}~\x7f'
-        '\x80\x81\x82\x83\x84\x85\x86\x87\x88\x89\x8a\x8b\x8c\x8d\x8e\x8f'
-        '\x90\x91\x92\x93\x94\x95\x96\x97\x98\x99\x9a\x9b\x9c\x9d\x9e\x9f'
-        '\xa0\xa1\xa2\xa3\xa4\xa5\xa6\xa7\xa8\xa9\xaa\xab\xac\xad\xae\xaf'
-        '\xb0\xb1\xb2\xb3\xb4\xb5\xb6\xb7\xb8\xb9\xba\xbb\xbc\xbd\xbe\xbf'
-        '\xc0\xc1\xc2\xc3\xc4\xc5\xc6\xc7\xc8\xc9\xca\xcb\xcc\xcd\xce\xcf'
-        '\xd0\xd1\xd2\xd3\xd4\xd5\xd6\xd7\xd8\xd9\xda\xdb\xdc\xdd\xde\xdf'
-        '\xe0\xe1\xe2\xe3\xe4\xe5\xe6\xe7\xe8\xe9\xea\xeb\xec\xed\xee\xef'
-        '\xf0\xf1\xf2\xf3\xf4\xf5\xf6\xf7\xf8\xf9\xfa\xfb\xfc\xfd\xfe\xff')
+    # translation table for reversing ascii art / -> \, etc.
+    __reverse_map__ = str.maketrans('()/\\<>[]{}', ')(\\/><][}{')
 
-    def reverse(self):
-        out = []
-        for row in self.splitlines():
-            out.append(row.translate(self.__reverse_map__)[::-1])
+    # translation table for flipping ascii art ^ -> v, etc.
+    __flip_map__ = str.maketrans('/\\AMPRVW^_bmvw', '\\/VWbbAMv-Pw^m')
 
-        return self.newFromList(out)
+    def reverse(self):
+        return self._transform(reverse=True)
 
     def flip(self):
-        out = []
-        for row in self.splitlines()[::-1]:
-            out.append(row.translate(self.__flip_map__))
+        return self._transform(flip=True)
 
-        return self.newFromList(out)
-
-    # doesn't do self.strip() because it could remove leading whitespace on first line of the font
-    # doesn't do row.strip() because it could remove empty lines within the font character
     def strip_surrounding_newlines(self):
+        return self._transform(strip_ws=True)
+
+    def normalize_surrounding_newlines(self):
+        return self._transform(normalize_ws=True)
+
+    def _transform(self, reverse=False, flip=False, strip_ws=False,
+                   normalize_ws=False):
+        """
+        Apply any combination of reverse, flip and strip/normalize of the
+        surrounding newlines in a single pass over the rows, rather than
+        building an intermediate string for each of them.
+        """
+        if not (reverse or flip or strip_ws or normalize_ws):
+            return self
+
+        rows = self.splitlines()
+        if flip:
+            rows.reverse()
+
         out = []
-        chars_seen = False
-        for row in self.splitlines():
+        # doesn't do self.strip() because it could remove leading whitespace on first line of the font
+        # doesn't do row.strip() because it could remove empty lines within the font character
+        chars_seen = not (strip_ws or normalize_ws)
+        for row in rows:
+            if reverse:
+                row = row.translate(self.__reverse_map__)[::-1]
+            if flip:
+                row = row.translate(self.__flip_map__)
             # if the row isn't empty or if we're in the middle of the font character, add the line.
-            if row.strip() != "" or chars_seen:
+            if chars_seen or (row and not row.isspace()):
                 chars_seen = True
                 out.append(row)
 
-        # rstrip to get rid of the trailing newlines
-        return self.newFromList(out).rstrip()
-
-    def normalize_surrounding_newlines(self):
-        return '\n' + self.strip_surrounding_newlines() + '\n'
+        result = self.newFromList(out)
+        if strip_ws or normalize_ws:
+            # rstrip to get rid of the trailing newlines
+            result = result.rstrip()
+            if not strip_ws:
+                result = '\n' + result + '\n'
+        return result
 
     def newFromList(self, list):
         return FigletString('\n'.join(list) + '\n')
@@ -496,10 +600,19 @@ class FigletBuilder(object):
     """
     Represent the internals of the build process
     """
+
+    # Memoized results of smushRule, keyed by the layout rules they depend on
+    _smushTables = {}
+
+    NEWLINE = ord('\n')
+    SPACE = ord(' ')
+
     def __init__(self, text, font, direction, width, justify):
 
-        self.text = list(map(ord, list(text)))
+        self.text = list(map(ord, text))
+        self.textLength = len(self.text)
         self.direction = direction
+        self.rightToLeft = direction == 'right-to-left'
         self.width = width
         self.font = font
         self.justify = justify
@@ -526,17 +639,21 @@ class FigletBuilder(object):
         self.SM_KERN = 64
         self.SM_SMUSH = 128
 
+        self.smushTable = self._smushTables.setdefault(
+            (font.smushMode, font.hardBlank, direction), {})
+
     # builder interface
 
     def addCharToProduct(self):
-        curChar = self.getCurChar()
+        c = self.text[self.iterator]
 
         # if the character is a newline, we flush the buffer
-        if self.text[self.iterator] == ord("\n"):
-                self.blankMarkers.append(([row for row in self.buffer], self.iterator))
-                self.handleNewLine()
-                return None
+        if c == self.NEWLINE:
+            self.blankMarkers.append((tuple(self.buffer), self.iterator))
+            self.handleNewLine()
+            return None
 
+        curChar = self.getCurChar()
         if curChar is None:
             return
         if self.width < self.getCurWidth():
@@ -546,18 +663,23 @@ class FigletBuilder(object):
 
         self.currentTotalWidth = len(self.buffer[0]) + self.curCharWidth - self.maxSmush
 
-        if self.text[self.iterator] == ord(' '):
-            self.blankMarkers.append(([row for row in self.buffer], self.iterator))
-
-        if self.text[self.iterator] == ord('\n'):
-            self.blankMarkers.append(([row for row in self.buffer], self.iterator))
-            self.handleNewLine()
+        if c == self.SPACE:
+            self.blankMarkers.append((tuple(self.buffer), self.iterator))
 
         if (self.currentTotalWidth >= self.width):
             self.handleNewLine()
         else:
-            for row in range(0, self.font.height):
-                self.addCurCharRowToBufferRow(curChar, row)
+            # Build all the rows of the new buffer in one go. Without any
+            # overlap (e.g. fixed width fonts) the rows simply get joined.
+            if self.maxSmush:
+                rows = [self.smushRow(curChar, row)
+                        for row in range(0, self.font.height)]
+            elif self.rightToLeft:
+                rows = zip(curChar, self.buffer)
+            else:
+                rows = zip(self.buffer, curChar)
+            self.buffer = [addLeft + addRight[self.maxSmush:]
+                           for addLeft, addRight in rows]
 
 
         self.prevCharWidth = self.curCharWidth
@@ -575,8 +697,7 @@ class FigletBuilder(object):
         return self.product.getString()
 
     def isNotFinished(self):
-        ret = self.iterator < len(self.text)
-        return ret
+        return self.iterator < self.textLength
 
     # private
 
@@ -588,14 +709,16 @@ class FigletBuilder(object):
         This create the output string representation from
         the internal representation of the product
         """
-        string_acc = ''
-        for buffer in self.product.queue:
-            buffer = self.justifyString(self.justify, buffer)
-            string_acc += self.replaceHardblanks(buffer)
-        self.product.buffer_string = string_acc
+        queue = self.product.queue
+        if self.justify in ('right', 'center'):
+            queue = [self.justifyString(self.justify, buffer)
+                     for buffer in queue]
+        rows = [row for buffer in queue for row in buffer]
+        rows.append('')
+        self.product.buffer_string = '\n'.join(rows).replace(self.font.hardBlank, ' ')
 
     def getCharAt(self, i):
-        if i < 0 or i >= len(list(self.text)):
+        if i < 0 or i >= self.textLength:
             return None
         c = self.text[i]
 
@@ -605,7 +728,7 @@ class FigletBuilder(object):
             return self.font.chars[c]
 
     def getCharWidthAt(self, i):
-        if i < 0 or i >= len(self.text):
+        if i < 0 or i >= self.textLength:
             return None
         c = self.text[i]
         if c not in self.font.chars:
@@ -619,43 +742,29 @@ class FigletBuilder(object):
     def getCurWidth(self):
         return self.getCharWidthAt(self.iterator)
 
-    def getLeftSmushedChar(self, i, addLeft):
-        idx = len(addLeft) - self.maxSmush + i
-        if idx >= 0 and idx < len(addLeft):
-            left = addLeft[idx]
-        else:
-            left = ''
-        return left, idx
-
     def currentSmushAmount(self, curChar):
-        return self.smushAmount(self.buffer, curChar)
-
-    def updateSmushedCharInLeftBuffer(self, addLeft, idx, smushed):
-        l = list(addLeft)
-        if idx < 0 or idx > len(l):
-            return addLeft
-        l[idx] = smushed
-        addLeft = ''.join(l)
-        return addLeft
+        edges = self.font.edges.get(self.text[self.iterator])
+        return self.smushAmount(self.buffer, curChar, edges)
 
     def smushRow(self, curChar, row):
         addLeft = self.buffer[row]
         addRight = curChar[row]
 
-        if self.direction == 'right-to-left':
+        if self.rightToLeft:
             addLeft, addRight = addRight, addLeft
 
+        # Smush the overlapping columns and splice them back onto the left
+        # part in one go, rather than rebuilding addLeft for every column.
+        start = len(addLeft) - self.maxSmush
+        smushed = []
         for i in range(0, self.maxSmush):
-            left, idx = self.getLeftSmushedChar(i, addLeft)
             right = addRight[i]
-            smushed = self.smushChars(left=left, right=right)
-            addLeft = self.updateSmushedCharInLeftBuffer(addLeft, idx, smushed)
+            if start + i >= 0:
+                smushed.append(self.smushChars(left=addLeft[start + i], right=right))
+        if smushed:
+            addLeft = addLeft[:max(start, 0)] + ''.join(smushed)
         return addLeft, addRight
 
-    def addCurCharRowToBufferRow(self, curChar, row):
-        addLeft, addRight = self.smushRow(curChar, row)
-        self.buffer[row] = addLeft + addRight[self.maxSmush:]
-
     def cutBufferCommon(self):
         self.currentTotalWidth = 0
         self.buffer = ['' for i in range(self.font.height)]
@@ -695,23 +804,14 @@ class FigletBuilder(object):
 
     def justifyString(self, justify, buffer):
         if justify == 'right':
-            for row in range(0, self.font.height):
-                buffer[row] = (
-                        ' ' * (self.width - len(buffer[row]) - 1)
-                        ) + buffer[row]
+            width = self.width - 1
+            buffer = [row.rjust(width) for row in buffer]
         elif justify == 'center':
-            for row in range(0, self.font.height):
-                buffer[row] = (
-                        ' ' * int((self.width - len(buffer[row])) / 2)
-                        ) + buffer[row]
+            buffer = [' ' * ((self.width - len(row)) // 2) + row
+                      for row in buffer]
         return buffer
 
-    def replaceHardblanks(self, buffer):
-        string = '\n'.join(buffer) + '\n'
-        string = string.replace(self.font.hardBlank, ' ')
-        return string
-
-    def smushAmount(self, buffer=[], curChar=[]):
+    def smushAmount(self, buffer=[], curChar=[], edges=None):
         """
         Calculate the amount of smushing we can do between this char and the
         last If this is the first char it will throw a series of exceptions
@@ -723,37 +823,50 @@ class FigletBuilder(object):
         if (self.font.smushMode & (self.SM_SMUSH | self.SM_KERN)) == 0:
             return 0
 
-        maxSmush = self.curCharWidth
-        for row in range(0, self.font.height):
-            lineLeft = buffer[row]
-            lineRight = curChar[row]
-            if self.direction == 'right-to-left':
-                lineLeft, lineRight = lineRight, lineLeft
+        # The character's side of each row was worked out when the font was
+        # loaded, so only the buffer's side needs examining here.
+        if edges is None:
+            edges = FigletFont.charEdges(curChar)
+        charLeft, charRight = edges
 
-            # Only strip ascii space to match figlet exactly.
-            linebd = len(lineLeft.rstrip(' ')) - 1
-            if linebd < 0:
-                linebd = 0
+        # Kerning-only fonts never smush a pair of visible characters, so
+        # don't bother asking smushChars about them.
+        canSmush = (self.font.smushMode & self.SM_SMUSH) != 0
+        rightToLeft = self.rightToLeft
 
-            if linebd < len(lineLeft):
-                ch1 = lineLeft[linebd]
+        maxSmush = self.curCharWidth
+        for row in range(0, self.font.height):
+            if rightToLeft:
+                gap, ch1 = charRight[row]
+                lineRight = buffer[row]
+
+                # Only strip ascii space to match figlet exactly.
+                charbd = len(lineRight) - len(lineRight.lstrip(' '))
+                if charbd < len(lineRight):
+                    ch2 = lineRight[charbd]
+                else:
+                    ch2 = ''
             else:
-                linebd = 0
-                ch1 = ''
+                lineLeft = buffer[row]
+                charbd, ch2 = charLeft[row]
 
-            # Only strip ascii space to match figlet exactly.
-            charbd = len(lineRight) - len(lineRight.lstrip(' '))
-            if charbd < len(lineRight):
-                ch2 = lineRight[charbd]
-            else:
-                charbd = len(lineRight)
-                ch2 = ''
+                # Only strip ascii space to match figlet exactly.
+                linebd = len(lineLeft.rstrip(' ')) - 1
+                if linebd < 0:
+                    linebd = 0
 
-            amt = charbd + len(lineLeft) - 1 - linebd
+                if linebd < len(lineLeft):
+                    ch1 = lineLeft[linebd]
+                else:
+                    linebd = 0
+                    ch1 = ''
+                gap = len(lineLeft) - 1 - linebd
+
+            amt = charbd + gap
 
             if ch1 == '' or ch1 == ' ':
                 amt += 1
-            elif (ch2 != ''
+            elif (canSmush and ch2 != ''
                     and self.smushChars(left=ch1, right=ch2) is not None):
                 amt += 1
 
@@ -780,6 +893,19 @@ class FigletBuilder(object):
         if (self.prevCharWidth < 2) or (self.curCharWidth < 2):
             return
 
+        # Everything past this point only depends on the font's layout rules
+        # and the direction, so look the pair up in the shared table first.
+        try:
+            return self.smushTable[left, right]
+        except KeyError:
+            smushed = self.smushTable[left, right] = self.smushRule(left, right)
+            return smushed
+
+    def smushRule(self, left, right):
+        """
+        Apply the font's smushing rules to two visible characters, returning
+        None if they cannot be smushed together.
+        """
         # kerning only
         if (self.font.smushMode & self.SM_SMUSH) == 0:
             return
@@ -795,7 +921,7 @@ class FigletBuilder(object):
             # Ensures that the dominant (foreground)
             # fig-character for overlapping is the latter in the
             # user's text, not necessarily the rightmost character.
-            if self.direction == 'right-to-left':
+            if self.rightToLeft:
                 return left
             else:
                 return right
@@ -868,30 +994,32 @@ class Figlet(object):
 
         self.Font = FigletFont(font=self.font)
 
-    def getDirection(self):
+        # Resolve 'auto' against the font once, rather than on every lookup
         if self._direction == 'auto':
-            direction = self.Font.printDirection
-            if direction == 0:
-                return 'left-to-right'
-            elif direction == 1:
-                return 'right-to-left'
+            if self.Font.printDirection == 1:
+                self._resolvedDirection = 'right-to-left'
             else:
-                return 'left-to-right'
+                self._resolvedDirection = 'left-to-right'
+        else:
+            self._resolvedDirection = self._direction
 
+        if self._justify == 'auto':
+            if self._resolvedDirection == 'left-to-right':
+                self._resolvedJustify = 'left'
+            elif self._resolvedDirection == 'right-to-left':
+                self._resolvedJustify = 'right'
+            else:
+                self._resolvedJustify = None
         else:
-            return self._direction
+            self._resolvedJustify = self._justify
+
+    def getDirection(self):
+        return self._resolvedDirection
 
     direction = property(getDirection)
 
     def getJustify(self):
-        if self._justify == 'auto':
-            if self.direction == 'left-to-right':
-                return 'left'
-            elif self.direction == 'right-to-left':
-                return 'right'
-
-        else:
-            return self._justify
+        return self._resolvedJustify
 
     justify = property(getJustify)
 
@@ -903,80 +1031,116 @@ class Figlet(object):
         return self.Font.getFonts()
 
 
-def color_to_ansi(color, isBackground):
+def _color_code(color, isBackground):
+    """
+    Return the SGR parameter(s) for a color, without the escape wrapper
+    """
     if not color:
         return ''
-    color = color.upper()
-    if color.count(';') > 0 and color.count(';') != 2:
-        raise InvalidColor('Specified color \'{}\' not a valid color in R;G;B format')
-    elif color.count(';') == 0 and color not in COLOR_CODES:
+    if not color.isupper():
+        color = color.upper()
+    namedCodes = BACKGROUND_COLOR_CODES if isBackground else FOREGROUND_COLOR_CODES
+    if color in namedCodes:
+        return namedCodes[color]
+
+    semicolons = color.count(';')
+    if semicolons == 0:
         raise InvalidColor('Specified color \'{}\' not found in ANSI COLOR_CODES list'.format(color))
+    elif semicolons != 2:
+        raise InvalidColor('Specified color \'{}\' not a valid color in R;G;B format'.format(color))
 
-    if color in COLOR_CODES:
-        ansiCode = COLOR_CODES[color]
-        if isBackground:
-            ansiCode += 10
-    else:
-        ansiCode = 48 if isBackground else 38
-        ansiCode = '{};2;{}'.format(ansiCode, color)
+    ansiCode = 48 if isBackground else 38
+    return '{};2;{}'.format(ansiCode, color)
 
-    return '\033[{}m'.format(ansiCode)
 
+def color_to_ansi(color, isBackground):
+    ansiCode = _color_code(color, isBackground)
+    return '\033[{}m'.format(ansiCode) if ansiCode else ''
 
-def parse_color(color):
+
+@functools.lru_cache(maxsize=128)
+def _parse_color_codes(color):
     foreground, _, background = color.partition(":")
-    ansiForeground = color_to_ansi(foreground, isBackground=False)
-    ansiBackground = color_to_ansi(background, isBackground=True)
-    return ansiForeground + ansiBackground
-
-
-def main():
-    parser = OptionParser(version=__version__,
-                          usage='%prog [options] [text..]')
-    parser.add_option('-f', '--font', default=DEFAULT_FONT,
-                      help='font to render with (default: %default)',
-                      metavar='FONT')
-    parser.add_option('-D', '--direction', type='choice',
-                      choices=('auto', 'left-to-right', 'right-to-left'),
-                      default='auto', metavar='DIRECTION',
-                      help='set direction text will be formatted in '
-                           '(default: %default)')
-    parser.add_option('-j', '--justify', type='choice',
-                      choices=('auto', 'left', 'center', 'right'),
-                      default='auto', metavar='SIDE',
-                      help='set justification, defaults to print direction')
-    parser.add_option('-w', '--width', type='int', default=80, metavar='COLS',
-                      help='set terminal width for wrapping/justification '
-                           '(default: %default)')
-    parser.add_option('-r', '--reverse', action='store_true', default=False,
-                      help='shows mirror image of output text')
-    parser.add_option('-n', '--normalize-surrounding-newlines', action='store_true', default=False,
-                      help='output has one empty line before and after')
-    parser.add_option('-s', '--strip-surrounding-newlines', action='store_true', default=False,
-                      help='removes empty leading and trailing lines')                      
-    parser.add_option('-F', '--flip', action='store_true', default=False,
-                      help='flips rendered output text over')
-    parser.add_option('-l', '--list_fonts', action='store_true', default=False,
-                      help='show installed fonts list')
-    parser.add_option('-i', '--info_font', action='store_true', default=False,
-                      help='show font\'s information, use with -f FONT')
-    parser.add_option('-L', '--load', default=None,
-                      help='load and install the specified font definition')
-    parser.add_option('-c', '--color', default=':',
-                      help='''prints text with passed foreground color,
-                            --color=foreground:background
-                            --color=:background\t\t\t # only background
-                            --color=foreground | foreground:\t # only foreground
-                            --color=list\t\t\t # list all colors
-                            COLOR = list[COLOR] | [0-255];[0-255];[0-255] (RGB)''')
-    opts, args = parser.parse_args()
+    return (_color_code(foreground, isBackground=False),
+            _color_code(background, isBackground=True))
+
+
+def _sgr(*codes):
+    # Emit a single SGR sequence covering all the given codes
+    ansiCodes = [code for code in codes if code]
+    return '\033[{}m'.format(';'.join(ansiCodes)) if ansiCodes else ''
+
+
+def _colors_for(text, color):
+    if color in (':', ''):
+        # The default, no colors at all
+        return ''
+    foreground, background = _parse_color_codes(color)
+    if not text.strip():
+        # There are no glyphs for a foreground color to paint
+        foreground = ''
+    return _sgr(foreground, background)
+
+
+def parse_color(color):
+    return _sgr(*_parse_color_codes(color))
+
+
+def main(argv=None):
+    # Only the command line needs argparse, so don't import it with the package
+    from argparse import SUPPRESS, ArgumentParser, RawTextHelpFormatter
+
+    # The color help is laid out one form per line, so don't let argparse
+    # re-wrap it
+    parser = ArgumentParser(usage='%(prog)s [options] [text..]',
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-f', '--font', default=DEFAULT_FONT,
+                        help='font to render with (default: %(default)s)',
+                        metavar='FONT')
+    parser.add_argument('-D', '--direction',
+                        choices=('auto', 'left-to-right', 'right-to-left'),
+                        default='auto', metavar='DIRECTION',
+                        help='set direction text will be formatted in '
+                             '(default: %(default)s)')
+    parser.add_argument('-j', '--justify',
+                        choices=('auto', 'left', 'center', 'right'),
+                        default='auto', metavar='SIDE',
+                        help='set justification, defaults to print direction')
+    parser.add_argument('-w', '--width', type=int, default=80, metavar='COLS',
+                        help='set terminal width for wrapping/justification '
+                             '(default: %(default)s)')
+    parser.add_argument('-r', '--reverse', action='store_true', default=False,
+                        help='shows mirror image of output text')
+    parser.add_argument('-n', '--normalize-surrounding-newlines', action='store_true', default=False,
+                        help='output has one empty line before and after')
+    parser.add_argument('-s', '--strip-surrounding-newlines', action='store_true', default=False,
+                        help='removes empty leading and trailing lines')
+    parser.add_argument('-F', '--flip', action='store_true', default=False,
+                        help='flips rendered output text over')
+    parser.add_argument('-l', '--list_fonts', action='store_true', default=False,
+                        help='show installed fonts list')
+    parser.add_argument('-i', '--info_font', action='store_true', default=False,
+                        help='show font\'s information, use with -f FONT')
+    parser.add_argument('-L', '--load', default=None,
+                        help='load and install the specified font definition')
+    parser.add_argument('-c', '--color', default=':',
+                        help='prints text with passed foreground color,\n'
+                             '--color=foreground:background\n'
+                             '--color=:background              # only background\n'
+                             '--color=foreground | foreground: # only foreground\n'
+                             '--color=list                     # list all colors\n'
+                             'COLOR = list[COLOR] | [0-255];[0-255];[0-255] (RGB)')
+    parser.add_argument('text', nargs='*', help=SUPPRESS)
+    opts = parser.parse_intermixed_args(argv)
+    args = opts.text
 
     if opts.list_fonts:
-        print('\n'.join(sorted(FigletFont.getFonts())))
+        print('\n'.join(FigletFont.getFonts()))
         exit(0)
 
     if opts.color == 'list':
-        print('[0-255];[0-255];[0-255] # RGB\n' + '\n'.join((sorted(COLOR_CODES.keys()))))
+        print('[0-255];[0-255];[0-255] # RGB\n' + '\n'.join(SORTED_COLOR_NAMES))
         exit(0)
 
     if opts.info_font:
@@ -991,9 +1155,6 @@ def main():
         parser.print_help()
         return 1
 
-    if sys.version_info < (3,):
-        args = [arg.decode('UTF-8') for arg in args]
-
     text = ' '.join(args)
 
     try:
@@ -1005,29 +1166,27 @@ def main():
         print(f"pyfiglet error: requested font {opts.font!r} not found.")
         return 1
 
-    r = f.renderText(text)
-    if opts.reverse:
-        r = r.reverse()
-    if opts.flip:
-        r = r.flip()
-    if opts.strip_surrounding_newlines:
-        r = r.strip_surrounding_newlines()
-    elif opts.normalize_surrounding_newlines:
-        r = r.normalize_surrounding_newlines()
-
-    if sys.version_info > (3,):
-        # Set stdout to binary mode
-        sys.stdout = sys.stdout.detach()
-
-    ansiColors = parse_color(opts.color)
-    if ansiColors:
-        sys.stdout.write(ansiColors.encode('UTF-8'))
-
-    sys.stdout.write(r.encode('UTF-8'))
-    sys.stdout.write(b'\n')
-
+    r = f.renderText(text)._transform(
+        reverse=opts.reverse, flip=opts.flip,
+        strip_ws=opts.strip_surrounding_newlines,
+        normalize_ws=opts.normalize_surrounding_newlines,
+    )
+
+    # ANSI escapes are always ASCII, and so is the output of most fonts, so
+    # skip the UTF-8 encoder where we can.
+    ansiColors = _colors_for(r, opts.color).encode('ascii')
+    # The whole block is drawn in one SGR state, and reset before the final
+    # newline so the colors don't bleed into the next line of the terminal.
+    output = r.encode('ascii' if r.isascii() else 'UTF-8')
     if ansiColors:
-        sys.stdout.write(RESET_COLORS)
+        output = ansiColors + output + RESET_COLORS
+    output += b'\n'
+
+    # Hand the whole payload to stdout's underlying binary buffer in one go,
+    # leaving sys.stdout itself untouched.
+    sys.stdout.flush()
+    sys.stdout.buffer.write(output)
+    sys.stdout.buffer.flush()
 
     return 0
 
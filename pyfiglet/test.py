@@ -1,26 +1,59 @@
 #!/usr/bin/env python
 
-from __future__ import print_function
 import os.path
 import sys
-from optparse import OptionParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from argparse import ArgumentParser
 from pyfiglet import Figlet
-from subprocess import Popen, PIPE
+from subprocess import PIPE, run
 try:
     from colorama import init
     init(strip=not sys.stdout.isatty())
-    from termcolor import cprint
+    from termcolor import colored, cprint
 except:
+    def colored(text, color):
+        return text
+
     def cprint(text, color):
         print(text)
 
 __version__ = '0.1'
 
 def fail(text):
-    cprint(text, 'red')
+    return colored(text, 'red')
 
 def win(text):
-    cprint(text, 'green')
+    return colored(text, 'green')
+
+@lru_cache(maxsize=None)
+def font_index():
+    # Map each font in pyfiglet/fonts to its extension, preferring .flf
+    index = {}
+    for entry in os.scandir(os.path.join('pyfiglet', 'fonts')):
+        name, ext = os.path.splitext(entry.name)
+        if ext in ('.flf', '.tlf') and index.get(name) != '.flf' and entry.is_file():
+            index[name] = ext
+    return index
+
+def outputUsingFigletorToilet(text, font, ext):
+    if ext == '.flf':
+        cmd = ('figlet', '-d', 'pyfiglet/fonts', '-f', font, text)
+    elif ext == '.tlf':
+        cmd = ('toilet', '-d', 'pyfiglet/fonts', '-f', font, text)
+    else:
+        raise Exception('Missing font file: {}'.format(
+            os.path.join('pyfiglet', 'fonts', font)))
+
+    # Undecodable output just shows up as a mismatch
+    return run(cmd, stdout=PIPE, encoding='utf8', errors='replace').stdout
+
+def render_font(text, font, ext):
+    # Runs in a worker process, so it only works from its arguments
+    outputPyfiglet = Figlet(font=font).renderText(text)
+    outputFiglet = outputUsingFigletorToilet(text, font, ext)
+    return font, outputFiglet, outputPyfiglet
 
 def dump(text):
     for line in text.split('\n'):
@@ -33,67 +66,65 @@ class Test(object):
         self.fail = 0
         self.failed = []
         self.oked = []
+        self.report = []
         # known bugs...
         self.skip = ['konto', 'konto_slant']
 
         self.f = Figlet()
 
-    def outputUsingFigletorToilet(self, text, font, fontpath):
-        if os.path.isfile(fontpath + '.flf'):
-            cmd = ('figlet', '-d', 'pyfiglet/fonts', '-f', font, text)
-        elif os.path.isfile(fontpath + '.tlf'):
-            cmd = ('toilet', '-d', 'pyfiglet/fonts', '-f', font, text)
-        else:
-            raise Exception('Missing font file: {}'.format(fontpath))
-
-        p = Popen(cmd, bufsize=4096, stdout=PIPE)
-        try:
-            outputFiglet = p.communicate()[0].decode('utf8')
-        except UnicodeDecodeError as e:
-            print("Unicode Error handling font {}".format(font))
-            outputFiglet = ''
-        return outputFiglet
-
     def validate_font_output(self, font, outputFiglet, outputPyfiglet):
         if outputPyfiglet == outputFiglet:
-            win('[OK] %s' % font)
+            self.report.append(win('[OK] %s' % font))
             self.ok += 1
             self.oked.append(font)
             return
 
-        fail('[FAIL] %s' % font)
+        self.report.append(fail('[FAIL] %s' % font))
         self.fail += 1
         self.failed.append(font)
         self.show_result(outputFiglet, outputPyfiglet, font)
 
+    def flush_report(self):
+        # Write out the buffered results in one go rather than once per font
+        if self.report:
+            sys.stdout.write('\n'.join(self.report) + '\n')
+            sys.stdout.flush()
+            self.report = []
+
     def show_result(self, outputFiglet, outputPyfiglet, font):
         if self.opts.show is True:
+            self.flush_report()
             print('[PYTHON] *** %s\n\n' % font)
             dump(outputPyfiglet)
             print('[FIGLET] *** %s\n\n' % font)
             dump(outputFiglet)
             input()
 
-    def check_font(self, text, font, use_tlf):
+    def should_check(self, font, use_tlf):
         # Skip flagged bad fonts
         if font in self.skip:
-            return
+            return False
 
         # Our TLF rendering isn't perfect, yet
-        fontpath = os.path.join('pyfiglet', 'fonts', font)
-        fig_file = os.path.isfile(fontpath + '.flf')
-        if not use_tlf and not fig_file:
-            return
-
-        self.f.setFont(font=font)
-        outputPyfiglet = self.f.renderText(text)
-        outputFiglet = self.outputUsingFigletorToilet(text, font, fontpath)
-        self.validate_font_output(font, outputFiglet, outputPyfiglet)
-
+        return use_tlf or font_index().get(font) == '.flf'
 
     def check_text(self, text, use_tlf):
-        for font in self.f.getFonts():
-            self.check_font(text, font, use_tlf)
+        fonts = [font for font in self.f.getFonts()
+                 if self.should_check(font, use_tlf)]
+        exts = [font_index().get(font) for font in fonts]
+        if self.opts.show is True:
+            # Failures pause for input, so keep the comparisons in order
+            for result in map(render_font, repeat(text), fonts, exts):
+                self.validate_font_output(*result)
+        else:
+            # Spread the pyfiglet renders and figlet/toilet runs over all
+            # cores, tallying the results back here in font order
+            with ProcessPoolExecutor() as executor:
+                results = executor.map(render_font, repeat(text), fonts, exts,
+                                       chunksize=16)
+                for result in results:
+                    self.validate_font_output(*result)
+        self.flush_report()
 
     def check_result(self):
         print('OK = %d, FAIL = %d' % (self.ok, self.fail))
@@ -102,17 +133,19 @@ class Test(object):
 
         return self.failed, self.oked
 
+bannerFiglet = Figlet()
+
 def banner(text):
-    cprint(Figlet().renderText(text), "blue")
+    cprint(bannerFiglet.renderText(text), "blue")
 
 def main():
-    parser = OptionParser(version=__version__)
-
-    parser.add_option('-s', '--show', action='store_true', default=False,
-                      help='pause at each failure and compare output '
-                           '(default: %default)')
+    parser = ArgumentParser()
+    parser.add_argument('--version', action='version', version=__version__)
+    parser.add_argument('-s', '--show', action='store_true', default=False,
+                        help='pause at each failure and compare output '
+                             '(default: %(default)s)')
 
-    opts, args = parser.parse_args()
+    opts = parser.parse_args()
     test = Test(opts)
     banner("TESTING one word")
     test.check_text("foo", True)
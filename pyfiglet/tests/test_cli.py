@@ -1,35 +1,25 @@
 import os
 import subprocess
+import sys
 
 import pytest
 
+from pyfiglet import main
 
-@pytest.fixture
-def test_font_dir():
-    swd = os.path.dirname(os.path.abspath(__file__))
-    return os.path.abspath(os.path.join(swd, '..', '..', 'test-fonts'))
+PYFIGLET_CMD = [sys.executable, '-m', 'pyfiglet']
 
+TEST_FONT_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'test-fonts'))
 
-def test_strip():
-    command = "pyfiglet -f slant -s 0"
-    expected = '''\
+EXPECTED_SLANT_STRIP = b'''\
    ____ 
   / __ \\
  / / / /
 / /_/ / 
 \\____/
 '''
-    result = subprocess.run(command, shell=True, stdout=subprocess.PIPE)
-    assert result.stdout.decode() == expected
-    assert result.returncode == 0
-
 
-def test_strip_strange_font(test_font_dir):
-    install_command = "pyfiglet -L %s/TEST_ONLY.flf " % test_font_dir
-    subprocess.run(install_command, shell=True, check=True)
-
-    command = "pyfiglet -f TEST_ONLY -s 0"
-    expected = '''\
+EXPECTED_TEST_ONLY_STRIP = b'''\
 0000000000  
             
 000    000  
@@ -40,23 +30,52 @@ def test_strip_strange_font(test_font_dir):
             
 0000000000
 '''
-    result = subprocess.run(command, shell=True, stdout=subprocess.PIPE)
-    assert result.stdout.decode() == expected
-    assert result.returncode == 0
-
 
 # normalize is just strip with padding
-def test_normalize():
-    command = "pyfiglet -f slant -n 0"
-    expected = '''\
+EXPECTED_SLANT_NORMALIZE = b'\n' + EXPECTED_SLANT_STRIP + b'\n'
 
-   ____ 
-  / __ \\
- / / / /
-/ /_/ / 
-\\____/
 
-'''
-    result = subprocess.run(command, shell=True, stdout=subprocess.PIPE)
-    assert result.stdout.decode() == expected
+def run_pyfiglet(*args, **kwargs):
+    return subprocess.run([*PYFIGLET_CMD, *args], capture_output=True, **kwargs)
+
+
+@pytest.fixture(scope='session')
+def test_only_font_installed():
+    run_pyfiglet('-L', os.path.join(TEST_FONT_DIR, 'TEST_ONLY.flf'), check=True)
+
+
+def test_strip(capsysbinary):
+    assert main(['-f', 'slant', '-s', '0']) == 0
+    assert capsysbinary.readouterr().out == EXPECTED_SLANT_STRIP
+
+
+def test_strip_strange_font(test_only_font_installed):
+    result = run_pyfiglet('-f', 'TEST_ONLY', '-s', '0')
+    assert result.stdout == EXPECTED_TEST_ONLY_STRIP
     assert result.returncode == 0
+
+
+def test_normalize(capsysbinary):
+    assert main(['-f', 'slant', '-n', '0']) == 0
+    assert capsysbinary.readouterr().out == EXPECTED_SLANT_NORMALIZE
+
+
+def test_color_whitespace_only(capsysbinary):
+    assert main(['-c', 'red', ' ']) == 0
+    assert b'\033' not in capsysbinary.readouterr().out
+
+
+def test_color_reset_before_newline(capsysbinary):
+    assert main(['-f', 'slant', '-c', 'red:blue', '-s', '0']) == 0
+    assert capsysbinary.readouterr().out == (
+        b'\033[31;44m' + EXPECTED_SLANT_STRIP.rstrip(b'\n') + b'\033[0m\n')
+
+
+def test_help_keeps_color_forms_on_separate_lines(capsys):
+    with pytest.raises(SystemExit):
+        main(['--help'])
+    lines = [line.strip() for line in capsys.readouterr().out.splitlines()]
+    assert '--color=foreground:background' in lines
+    assert '--color=:background              # only background' in lines
+    assert '--color=foreground | foreground: # only foreground' in lines
+    assert '--color=list                     # list all colors' in lines
@@ -0,0 +1,21 @@
+import pytest
+
+from pyfiglet import InvalidColor, parse_color
+
+
+def test_named_foreground_and_background():
+    assert parse_color('red:blue') == '\033[31;44m'
+
+
+def test_rgb_foreground_and_background():
+    assert parse_color('1;2;3:4;5;6') == '\033[38;2;1;2;3;48;2;4;5;6m'
+
+
+def test_background_only():
+    assert parse_color(':blue') == '\033[44m'
+
+
+@pytest.mark.parametrize('color', ['nope', '1;2'])
+def test_invalid_color(color):
+    with pytest.raises(InvalidColor):
+        parse_color(color)
@@ -0,0 +1,11 @@
+from pyfiglet import Figlet, FigletFont
+
+
+def test_font_instances_are_independent():
+    expected = Figlet('standard').renderText('A')
+
+    font = FigletFont('standard')
+    font.chars[ord('A')][1] = 'XXXXX'
+
+    assert Figlet('standard').renderText('A') == expected
+    assert FigletFont('standard').chars[ord('A')][1] != 'XXXXX'